@@ -3,159 +3,310 @@
 Конфигурация парсера из YAML-файла или значений по умолчанию
 """
 
+import hashlib
+import logging
 import os
-from typing import Dict, Any, List
+import pickle
+import random
+import struct
+import sys
+from collections.abc import Mapping
+from dataclasses import dataclass, field, fields
+from types import MappingProxyType
 
+_log = logging.getLogger(__name__)
 
+# PyYAML импортируется один раз при загрузке модуля.
+# C-загрузчик (libyaml), если PyYAML собран с ним, иначе чистый Python
+try:
+    import yaml
+
+    try:
+        from yaml import CSafeLoader as _YamlLoader
+    except ImportError:
+        from yaml import SafeLoader as _YamlLoader
+
+    _YAML_OK = True
+except ImportError:
+    _YAML_OK = False
+
+
+# Заголовок кэша переопределений: (схема, st_mtime_ns, st_size) исходного файла.
+# Схема - хэш таблиц ключей YAML, полей Config и загрузчика YAML (см. Config._cache_schema)
+_CACHE_HEADER = struct.Struct('<8sqq')
+_cache_schema = None
+
+
+def _read_yaml_cache(cache_path: str, key: bytes):
+    """Чтение переопределений конфигурации из кэша, None если кэш отсутствует или устарел"""
+    try:
+        with open(cache_path, 'rb') as f:
+            if f.read(_CACHE_HEADER.size) != key:
+                return None
+            return pickle.load(f)
+    except Exception:
+        return None
+
+
+def _write_yaml_cache(cache_path: str, key: bytes, overrides):
+    """Атомарная запись переопределений конфигурации в кэш"""
+    tmp_path = cache_path + '.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(key)
+            pickle.dump(overrides, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # Кэш необязателен (например, каталог только для чтения)
+        pass
+
+
+# Общая пустая секция для отсутствующих разделов YAML (только для чтения)
+_EMPTY = {}
+
+
+def _intern_keys(mapping: dict[str, object]) -> dict[str, object]:
+    """Копия словаря с интернированными ключами"""
+    return {sys.intern(k): v for k, v in mapping.items()}
+
+
+# Значения по умолчанию для полей-коллекций. Словари селекторов обернуты
+# в MappingProxyType: все экземпляры Config делят одну копию только для чтения
+_DEFAULT_USER_AGENTS = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Safari/605.1.15",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:121.0) Gecko/20100101 Firefox/121.0",
+)
+
+_DEFAULT_SELECTORS_LIST = MappingProxyType({
+    'hotel_container': 'div.product-list div.item',
+    'hotel_link': 'a.product-name',
+    'reviews_count': 'a.reviews-counter',
+    'rating': 'div.rating-score-2 span:nth-of-type(2)',
+})
+
+_DEFAULT_SELECTORS_HOTEL = MappingProxyType({
+    'review_item': 'div.review-list-2 div.item',
+    'review_rating': 'div.rating-score span',  # Рейтинг отзыва (текст)
+    'review_rating_score': 'div.rating-score span',  # Рейтинг отзыва (число)
+    'review_date': 'div.review-postdate',
+    'review_date_meta': 'meta[itemprop="datePublished"]',
+    'review_title': 'h3.review-title a',
+    'review_teaser': 'div.review-teaser',
+    'review_plus': 'div.review-plus',
+    'review_minus': 'div.review-minus',
+    'review_author': 'div.user-info a.user-login span',
+    'review_author_location': 'div.user-info div:nth-of-type(3)',
+    'review_recommendations': 'a.review-yes span',
+    'review_comments': 'a.review-comments span',
+    'review_images': 'div.review-thumbs img',
+})
+
+
+@dataclass(frozen=True, slots=True)
 class Config:
     """Конфигурация парсера"""
 
-    def __init__(self, config_path='config.yml'):
-        # Устанавливаем значения по умолчанию
-        self._set_defaults()
-
-        # Пытаемся загрузить из YAML если файл существует
-        if os.path.exists(config_path):
-            self._try_load_yaml(config_path)
-        else:
-            print(f"⚠️  Конфигурационный файл {config_path} не найден, использую значения по умолчанию")
-
-    def _set_defaults(self):
-        """Установка значений по умолчания"""
-        # Основные настройки
-        self.BASE_URL = 'https://otzovik.com/travel/hotels/'
-        self.MAX_PAGES = 1462
-        self.OUTPUT_FILE = 'otzovik_reviews.csv'
-        self.PROGRESS_FILE = 'progress.json'
-
-        # Задержки для обхода блокировок
-        self.DELAY_MIN = 10
-        self.DELAY_MAX = 20
-        self.DELAY_BETWEEN_PAGES_MIN = 3
-        self.DELAY_BETWEEN_PAGES_MAX = 5
-        self.DELAY_BETWEEN_HOTELS_MIN = 3
-        self.DELAY_BETWEEN_HOTELS_MAX = 5
-        self.DELAY_AFTER_BLOCK = 60
-        self.MAX_RETRIES = 3
-        self.TIMEOUT = 30
-
-        # Ограничения
-        self.MAX_HOTELS_PER_PAGE = 20
-        self.MAX_REVIEWS_PER_HOTEL = 50
-
-        # User-Agents
-        self.USER_AGENTS = [
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Safari/605.1.15",
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:121.0) Gecko/20100101 Firefox/121.0",
-        ]
+    # Основные настройки
+    BASE_URL: str = 'https://otzovik.com/travel/hotels/'
+    MAX_PAGES: int = 1462
+    OUTPUT_FILE: str = 'otzovik_reviews.csv'
+    PROGRESS_FILE: str = 'progress.json'
+    KEEP_BEFORE_2020: bool = True  # False - отзывы до 2020 года не сохраняются
+
+    # Задержки для обхода блокировок
+    DELAY_MIN: float = 10
+    DELAY_MAX: float = 20
+    DELAY_BETWEEN_PAGES_MIN: float = 3
+    DELAY_BETWEEN_PAGES_MAX: float = 5
+    DELAY_BETWEEN_HOTELS_MIN: float = 3
+    DELAY_BETWEEN_HOTELS_MAX: float = 5
+    DELAY_AFTER_BLOCK: float = 60
+    MAX_RETRIES: int = 3
+    TIMEOUT: float = 30
+
+    # Ограничения
+    MAX_HOTELS_PER_PAGE: int = 20
+    MAX_REVIEWS_PER_HOTEL: int = 50
+    CONCURRENCY: int = 4  # Параллельных загрузок страниц отелей
+
+    # User-Agents
+    USER_AGENTS: tuple[str, ...] = _DEFAULT_USER_AGENTS
+
+    # Селекторы
+    # Всегда MappingProxyType (только чтение); mappingproxy не хэшируется,
+    # поэтому в hash(Config) селекторы не участвуют (в сравнении - участвуют)
+    SELECTORS_LIST: Mapping[str, str] = field(default_factory=lambda: _DEFAULT_SELECTORS_LIST, hash=False)
+    SELECTORS_HOTEL: Mapping[str, str] = field(default_factory=lambda: _DEFAULT_SELECTORS_HOTEL, hash=False)
+
+    # Соответствие ключей секций YAML атрибутам конфигурации
+    _SCRAPER_KEYS = {
+        'base_url': 'BASE_URL',
+        'max_pages': 'MAX_PAGES',
+        'output_file': 'OUTPUT_FILE',
+        'progress_file': 'PROGRESS_FILE',
+        'keep_before_2020': 'KEEP_BEFORE_2020',
+    }
+    _DELAY_KEYS = {
+        'min': 'DELAY_MIN',
+        'max': 'DELAY_MAX',
+        'after_block': 'DELAY_AFTER_BLOCK',
+    }
+    _BETWEEN_PAGES_KEYS = {
+        'min': 'DELAY_BETWEEN_PAGES_MIN',
+        'max': 'DELAY_BETWEEN_PAGES_MAX',
+    }
+    _BETWEEN_HOTELS_KEYS = {
+        'min': 'DELAY_BETWEEN_HOTELS_MIN',
+        'max': 'DELAY_BETWEEN_HOTELS_MAX',
+    }
+    _LIMIT_KEYS = {
+        'max_retries': 'MAX_RETRIES',
+        'timeout': 'TIMEOUT',
+        'max_hotels_per_page': 'MAX_HOTELS_PER_PAGE',
+        'max_reviews_per_hotel': 'MAX_REVIEWS_PER_HOTEL',
+        'concurrency': 'CONCURRENCY',
+    }
+
+    @classmethod
+    def from_yaml(cls, config_path='config.yml') -> 'Config':
+        """Конфигурация из YAML-файла поверх значений по умолчанию"""
+        overrides = cls._try_load_yaml(config_path)
+
+        # Селекторы из YAML дополняют значения по умолчанию. Ключи интернируются,
+        # как и литералы в коде: поиск по ним идет сравнением указателей
+        if 'SELECTORS_LIST' in overrides:
+            overrides['SELECTORS_LIST'] = MappingProxyType(
+                {**_DEFAULT_SELECTORS_LIST, **_intern_keys(overrides['SELECTORS_LIST'])})
+
+        if 'SELECTORS_HOTEL' in overrides:
+            overrides['SELECTORS_HOTEL'] = MappingProxyType(
+                {**_DEFAULT_SELECTORS_HOTEL, **_intern_keys(overrides['SELECTORS_HOTEL'])})
+
+        return cls(**overrides)
+
+    @classmethod
+    def _try_load_yaml(cls, config_path: str) -> dict[str, object]:
+        """Пытаемся загрузить из YAML файла значения, отличные от значений по умолчанию"""
+        overrides = {}
+
+        if not _YAML_OK:
+            _log.warning("Модуль PyYAML не установлен, использую значения по умолчанию")
+            return overrides
 
-        # Селекторы
-        self.SELECTORS_LIST = {
-            'hotel_container': 'div.product-list div.item',
-            'hotel_link': 'a.product-name',
-            'reviews_count': 'a.reviews-counter',
-            'rating': 'div.rating-score-2 span:nth-of-type(2)',
-        }
-
-        self.SELECTORS_HOTEL = {
-            'review_item': 'div.review-list-2 div.item',
-            'review_rating': 'div.rating-score span',  # Рейтинг отзыва (текст)
-            'review_rating_score': 'div.rating-score span',  # Рейтинг отзыва (число)
-            'review_date': 'div.review-postdate',
-            'review_date_meta': 'meta[itemprop="datePublished"]',
-            'review_title': 'h3.review-title a',
-            'review_teaser': 'div.review-teaser',
-            'review_plus': 'div.review-plus',
-            'review_minus': 'div.review-minus',
-            'review_author': 'div.user-info a.user-login span',
-            'review_author_location': 'div.user-info div:nth-of-type(3)',
-            'review_recommendations': 'a.review-yes span',
-            'review_comments': 'a.review-comments span',
-            'review_images': 'div.review-thumbs img',
-        }
-
-    def _try_load_yaml(self, config_path: str):
-        """Пытаемся загрузить конфигурацию из YAML файла"""
         try:
-            # Пробуем импортировать yaml
-            import yaml
+            # Один open без предварительной проверки существования; ключ кэша - из fstat.
+            # Бинарный режим: PyYAML сам определяет кодировку
+            with open(config_path, 'rb') as f:
+                # Кэш сбрасывается автоматически при изменении файла (mtime/размер)
+                st = os.fstat(f.fileno())
+                cache_key = _CACHE_HEADER.pack(cls._cache_schema(), st.st_mtime_ns, st.st_size)
+                cache_path = config_path + '.cache.pkl'
+
+                # В кэше готовые переопределения: ни разбора YAML, ни обхода секций
+                cached = _read_yaml_cache(cache_path, cache_key)
+                if cached is not None:
+                    _log.info("Конфигурация загружена из %s", config_path)
+                    return cached
 
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config_data = yaml.safe_load(f)
+                # Файл небольшой: читаем целиком одним read() и разбираем из памяти
+                raw = f.read()
+                config_data = yaml.load(raw, Loader=_YamlLoader)
 
             if not config_data:
-                print(f"⚠️  Конфигурационный файл {config_path} пуст")
-                return
+                _log.warning("Конфигурационный файл %s пуст", config_path)
+                return overrides
+
+            # Отсутствующая (или пустая) секция превращается в пустой словарь:
+            # один поиск по ключу вместо проверки 'in' и последующей индексации
 
             # Основные настройки
-            if 'scraper' in config_data:
-                scraper = config_data['scraper']
-                self.BASE_URL = scraper.get('base_url', self.BASE_URL)
-                self.MAX_PAGES = scraper.get('max_pages', self.MAX_PAGES)
-                self.OUTPUT_FILE = scraper.get('output_file', self.OUTPUT_FILE)
-                self.PROGRESS_FILE = scraper.get('progress_file', self.PROGRESS_FILE)
+            cls._apply_section(config_data.get('scraper') or _EMPTY, cls._SCRAPER_KEYS, overrides)
 
             # Задержки
-            if 'delays' in config_data:
-                delays = config_data['delays']
-                self.DELAY_MIN = delays.get('min', self.DELAY_MIN)
-                self.DELAY_MAX = delays.get('max', self.DELAY_MAX)
-                self.DELAY_AFTER_BLOCK = delays.get('after_block', self.DELAY_AFTER_BLOCK)
-
-                if 'between_pages' in delays:
-                    between_pages = delays['between_pages']
-                    self.DELAY_BETWEEN_PAGES_MIN = between_pages.get('min', self.DELAY_BETWEEN_PAGES_MIN)
-                    self.DELAY_BETWEEN_PAGES_MAX = between_pages.get('max', self.DELAY_BETWEEN_PAGES_MAX)
-
-                if 'between_hotels' in delays:
-                    between_hotels = delays['between_hotels']
-                    self.DELAY_BETWEEN_HOTELS_MIN = between_hotels.get('min', self.DELAY_BETWEEN_HOTELS_MIN)
-                    self.DELAY_BETWEEN_HOTELS_MAX = between_hotels.get('max', self.DELAY_BETWEEN_HOTELS_MAX)
+            delays = config_data.get('delays') or _EMPTY
+            cls._apply_section(delays, cls._DELAY_KEYS, overrides)
+            cls._apply_section(delays.get('between_pages') or _EMPTY, cls._BETWEEN_PAGES_KEYS, overrides)
+            cls._apply_section(delays.get('between_hotels') or _EMPTY, cls._BETWEEN_HOTELS_KEYS, overrides)
 
             # Ограничения
-            if 'limits' in config_data:
-                limits = config_data['limits']
-                self.MAX_RETRIES = limits.get('max_retries', self.MAX_RETRIES)
-                self.TIMEOUT = limits.get('timeout', self.TIMEOUT)
-                self.MAX_HOTELS_PER_PAGE = limits.get('max_hotels_per_page', self.MAX_HOTELS_PER_PAGE)
-                self.MAX_REVIEWS_PER_HOTEL = limits.get('max_reviews_per_hotel', self.MAX_REVIEWS_PER_HOTEL)
+            cls._apply_section(config_data.get('limits') or _EMPTY, cls._LIMIT_KEYS, overrides)
 
             # User-Agents
-            if 'user_agents' in config_data:
-                self.USER_AGENTS = config_data['user_agents']
+            user_agents = config_data.get('user_agents')
+            if user_agents is not None:
+                overrides['USER_AGENTS'] = tuple(user_agents)
 
             # Селекторы
-            if 'selectors' in config_data:
-                selectors = config_data['selectors']
+            selectors = config_data.get('selectors') or _EMPTY
 
-                if 'list_page' in selectors:
-                    self.SELECTORS_LIST.update(selectors['list_page'])
+            list_page = selectors.get('list_page')
+            if list_page is not None:
+                overrides['SELECTORS_LIST'] = dict(list_page)
 
-                if 'hotel_page' in selectors:
-                    self.SELECTORS_HOTEL.update(selectors['hotel_page'])
+            hotel_page = selectors.get('hotel_page')
+            if hotel_page is not None:
+                overrides['SELECTORS_HOTEL'] = dict(hotel_page)
 
-            print(f"✅ Конфигурация загружена из {config_path}")
+            _write_yaml_cache(cache_path, cache_key, overrides)
+            _log.info("Конфигурация загружена из %s", config_path)
 
-        except ImportError:
-            print(f"⚠️  Модуль PyYAML не установлен, использую значения по умолчанию")
+        except FileNotFoundError:
+            _log.warning("Конфигурационный файл %s не найден, использую значения по умолчанию", config_path)
         except Exception as e:
-            print(f"⚠️  Ошибка загрузки конфигурации из YAML: {e}")
+            _log.warning("Ошибка загрузки конфигурации из YAML: %s", e)
+
+        return overrides
+
+    @classmethod
+    def _cache_schema(cls) -> bytes:
+        """Отпечаток всего, от чего зависят кэшированные переопределения"""
+        # Новый ключ YAML, поле Config или другой загрузчик меняют отпечаток,
+        # и старый кэш отбрасывается без ручного увеличения версии
+        global _cache_schema
+        if _cache_schema is None:
+            parts = (
+                cls._SCRAPER_KEYS, cls._DELAY_KEYS, cls._BETWEEN_PAGES_KEYS,
+                cls._BETWEEN_HOTELS_KEYS, cls._LIMIT_KEYS,
+                [(f.name, str(f.type)) for f in fields(cls)],
+                f"{_YamlLoader.__module__}.{_YamlLoader.__name__}", yaml.__version__,
+            )
+            _cache_schema = hashlib.blake2b(repr(parts).encode('utf-8'), digest_size=8).digest()
+        return _cache_schema
+
+    @staticmethod
+    def _apply_section(section: dict[str, object], keys: dict[str, str], overrides: dict[str, object]):
+        """Перенос заданных в секции YAML значений в переопределения конфигурации"""
+        for yaml_key, attr in keys.items():
+            if yaml_key in section:
+                overrides[attr] = section[yaml_key]
+
+    def pick_user_agent(self) -> str:
+        """Случайный User-Agent из списка"""
+        return random.choice(self.USER_AGENTS)
 
     def display(self):
         """Отображение текущей конфигурации"""
-        print("\n📋 ТЕКУЩАЯ КОНФИГУРАЦИЯ:")
-        print("-" * 50)
-        print(f"BASE_URL: {self.BASE_URL}")
-        print(f"MAX_PAGES: {self.MAX_PAGES}")
-        print(f"OUTPUT_FILE: {self.OUTPUT_FILE}")
-        print(f"PROGRESS_FILE: {self.PROGRESS_FILE}")
-        print(f"TIMEOUT: {self.TIMEOUT}")
-        print(f"MAX_RETRIES: {self.MAX_RETRIES}")
-        print(f"DELAY_MIN/MAX: {self.DELAY_MIN}/{self.DELAY_MAX}")
-        print("-" * 50)
+        # Один вызов write вместо отдельного print на каждую строку
+        lines = [
+            "",
+            "📋 ТЕКУЩАЯ КОНФИГУРАЦИЯ:",
+            "-" * 50,
+            f"BASE_URL: {self.BASE_URL}",
+            f"MAX_PAGES: {self.MAX_PAGES}",
+            f"OUTPUT_FILE: {self.OUTPUT_FILE}",
+            f"PROGRESS_FILE: {self.PROGRESS_FILE}",
+            f"KEEP_BEFORE_2020: {self.KEEP_BEFORE_2020}",
+            f"TIMEOUT: {self.TIMEOUT}",
+            f"MAX_RETRIES: {self.MAX_RETRIES}",
+            f"CONCURRENCY: {self.CONCURRENCY}",
+            f"DELAY_MIN/MAX: {self.DELAY_MIN}/{self.DELAY_MAX}",
+            "-" * 50,
+        ]
+        sys.stdout.write("\n".join(lines) + "\n")
 
 
 if __name__ == "__main__":
-    config = Config()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    config = Config.from_yaml()
     config.display()
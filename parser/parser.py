@@ -6,52 +6,181 @@
 """
 
 import requests
-from bs4 import BeautifulSoup
-import pandas as pd
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.util.request import ACCEPT_ENCODING
+from selectolax.lexbor import LexborHTMLParser
 import time
 import random
 import re
-import json
+import csv
+import orjson
+import hashlib
+from bisect import bisect_right
 import os
 import sys
-from datetime import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import replace
+from datetime import datetime, timedelta
 from urllib.parse import urljoin
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable
 
 # Импортируем Config из config.py
 from config import Config
 
+# Регулярные выражения компилируются один раз при загрузке модуля
+_RE_DATE_RU = re.compile(r'(\d{1,2})\s+([а-я]+)\s+(\d{4})', re.IGNORECASE)  # 8 окт 2025
+_RE_DATE_DOT = re.compile(r'(\d{1,2})\.(\d{1,2})\.(\d{4})')  # 08.10.2025
+_RE_DATE_ISO = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})')  # 2025-10-08
+_RE_RATING = re.compile(r'(\d+)[,\.]?(\d*)')
+_RE_COUNT = re.compile(r'(\d+)')
+
+# Граница признака before_2020: отзывы, написанные раньше этого года
+_BEFORE_YEAR = 2020
+
+# После стольких записей журнал прогресса сворачивается в снимок
+_PROGRESS_COMPACT_EVERY = 10000
+
+# Признаки страницы блокировки. Ищутся одной регуляркой прямо в байтах ответа,
+# без декодирования и копии в нижнем регистре. IGNORECASE для bytes действует
+# только на ASCII, поэтому каждая не-ASCII буква раскрывается в (?:ЗАГЛАВНАЯ|строчная)
+_BLOCK_INDICATORS = (
+    'captcha', 'recaptcha', 'cloudflare', 'доступ ограничен',
+    'your access has been blocked', 'blocked', '403 forbidden',
+    'too many requests', 'rate limit exceeded'
+)
+
+
+def _bytes_pattern_any_case(text: str) -> bytes:
+    """Шаблон для bytes-регулярки, совпадающий с text в любом регистре"""
+    parts = []
+    for char in text:
+        if char.isascii() or char.upper() == char.lower():
+            parts.append(re.escape(char.encode('utf-8')))
+        else:
+            parts.append(b'(?:' + re.escape(char.upper().encode('utf-8')) + b'|' +
+                         re.escape(char.lower().encode('utf-8')) + b')')
+    return b''.join(parts)
+
+
+_RE_BLOCKED = re.compile(
+    b'|'.join(_bytes_pattern_any_case(indicator) for indicator in _BLOCK_INDICATORS),
+    re.IGNORECASE)
+
+# Границы округления оценки до звезд: [1.5, 2.5) -> 2 ... [4.5, +inf) -> 5
+_STAR_THRESHOLDS = (1.5, 2.5, 3.5, 4.5)
+
+
+# Русские названия месяцев в родительном падеже
+_MONTHS_RU = {
+    'января': '01', 'февраля': '02', 'марта': '03',
+    'апреля': '04', 'мая': '05', 'июня': '06',
+    'июля': '07', 'августа': '08', 'сентября': '09',
+    'октября': '10', 'ноября': '11', 'декабря': '12'
+}
+
+# macOS-специфичные заголовки браузера (User-Agent выбирается при создании сессии)
+_DEFAULT_HEADERS = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7',
+    # Только то, что urllib3 умеет распаковать: br - при установленном brotli
+    'Accept-Encoding': ACCEPT_ENCODING,
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Sec-Fetch-User': '?1',
+    'Cache-Control': 'max-age=0',
+    'DNT': '1',
+    'Referer': 'https://otzovik.com/',
+}
+
+
+def _apply_date_ru(match, date_data: Dict[str, str]):
+    """Заполнение полей даты из формата '8 октября 2025'"""
+    day, month_ru, year = match.groups()
+    month = _MONTHS_RU.get(month_ru.lower(), '01')
+    date_data['year'] = year
+    date_data['month'] = month
+    date_data['day'] = f"{int(day):02d}"
+    date_data['display'] = f"{day}.{month}.{year}"
+
+
+# Столбцы результата в порядке вывода в CSV/JSON
+REVIEW_FIELDS = (
+    'review_id', 'hotel_id', 'hotel_name', 'hotel_url', 'hotel_rating', 'review_rating_text',
+    'review_rating_numeric', 'review_rating_stars', 'review_title', 'review_text', 'review_teaser',
+    'review_plus', 'review_minus', 'review_date', 'review_date_iso', 'review_date_raw',
+    'review_year', 'review_month', 'review_day', 'before_2020', 'review_author',
+    'review_author_location', 'recommendations', 'comments', 'images_count', 'images', 'list_page',
+    'scraped_at',
+)
+
+# Любая из дат выше - для поиска по всему тексту отзыва одним проходом
+_RE_DATE_ANY = re.compile(r'\d{1,2}\s+[а-я]+\s+\d{4}|\d{1,2}\.\d{1,2}\.\d{4}|\d{4}-\d{1,2}-\d{1,2}', re.IGNORECASE)
+
+# Форматы даты в тексте и их обработчики (None - дата берется как есть)
+_DATE_PATTERNS = (
+    (_RE_DATE_RU, _apply_date_ru),
+    (_RE_DATE_DOT, None),
+    (_RE_DATE_ISO, None),
+)
+
 
 # ===================== ОСНОВНОЙ ПАРСЕР =====================
 class OtzyovikParser:
     """Парсер Otzyovik.com с оценкой отзыва и признаком "до 2020" """
 
     def __init__(self, config: Optional[Config] = None):
-        self.config = config or Config()
-
-        # Установка задержек 1-2 секунды везде
-        self.config.DELAY_MIN = 3.0
-        self.config.DELAY_MAX = 5.0
-        self.config.DELAY_BETWEEN_HOTELS_MIN = 3.0
-        self.config.DELAY_BETWEEN_HOTELS_MAX = 5.0
-        self.config.DELAY_BETWEEN_PAGES_MIN = 3.0
-        self.config.DELAY_BETWEEN_PAGES_MAX = 5.0
-        self.config.DELAY_AFTER_BLOCK = 10  # Уменьшили с 30 до 10 при блокировке
-
-        # Проверяем наличие атрибута TIMEOUT
-        if not hasattr(self.config, 'TIMEOUT'):
-            print("⚠️  Внимание: у конфигурации нет атрибута TIMEOUT, устанавливаю 10")
-            self.config.TIMEOUT = 10
+        # Установка задержек 1-2 секунды везде.
+        # Config неизменяем, поэтому парсер работает со своей копией
+        self.config = replace(
+            config or Config.from_yaml(),
+            DELAY_MIN=3.0,
+            DELAY_MAX=5.0,
+            DELAY_BETWEEN_HOTELS_MIN=3.0,
+            DELAY_BETWEEN_HOTELS_MAX=5.0,
+            DELAY_BETWEEN_PAGES_MIN=3.0,
+            DELAY_BETWEEN_PAGES_MAX=5.0,
+            DELAY_AFTER_BLOCK=10,  # Уменьшили с 30 до 10 при блокировке
+        )
 
         self.session = self._create_session()
 
         # Состояние парсера
-        self.results = []
+        # Сами отзывы в памяти не держатся - они в журнале results.jsonl.
+        # Для каждого review_id помним номер последней записи в журнале
+        # (повторный отзыв заменяет прежний) и его оценку/признак до 2020
+        self._review_rows = {}
+        self._results_seq = 0
+
+        # Накопительные итоги по собранным отзывам для финального отчета
+        self._rating_sum = 0.0
+        self._rating_count = 0
+        self._before_2020_count = 0
+        # Отзывы до 2020 года, отсеянные при KEEP_BEFORE_2020=False: в журнал
+        # отзывов они не попадают, поэтому счетчик хранится в прогрессе
+        self._dropped_before_2020 = 0
         self.processed_hotels = set()
         self.processed_pages = set()
         self.total_requests = 0
         self.blocked_count = 0
         self.start_time = datetime.now()
+        # Длительность считается по монотонным часам: их не сдвигает NTP
+        self._start_monotonic = time.monotonic()
+
+        # Степень сжатия ответов пишется в лог один раз, по первому ответу
+        self._compression_logged = False
+
+        # Общее для всех потоков расписание запросов: момент (time.monotonic),
+        # раньше которого следующий запрос не отправляется
+        self._next_request_time = 0.0
+        self._rate_lock = threading.Lock()
+
+        # Счетчики обновляются из рабочих потоков загрузки отелей
+        self._counters_lock = threading.Lock()
 
         # Создаем папки для данных
         os.makedirs('data', exist_ok=True)
@@ -60,9 +189,21 @@ class OtzyovikParser:
         # Настройка логирования
         self._setup_logging()
 
+        # Отзывы дописываются в JSONL по мере сбора, файл прогресса
+        # хранит только обработанные страницы/отели и счетчики
+        self.results_log = os.path.join('data', 'results.jsonl')
+
+        # Обработанные отели/страницы дописываются в журнал рядом с файлом
+        # прогресса; сам файл прогресса - периодический снимок
+        self.progress_log = self.config.PROGRESS_FILE + '.log'
+        self._progress_log_entries = 0
+
         # Загрузка прогресса
         self._load_progress()
 
+        self._results_fp = open(self.results_log, 'ab', buffering=1 << 20)
+        self._progress_fp = open(self.progress_log, 'ab')
+
     def _setup_logging(self):
         """Настройка логирования"""
         import logging
@@ -81,27 +222,26 @@ class OtzyovikParser:
         """Создание HTTP-сессии с реалистичными заголовками"""
         session = requests.Session()
 
-        # Выбираем случайный User-Agent
-        user_agent = random.choice(self.config.USER_AGENTS)
-
-        # macOS-специфичные заголовки браузера
-        headers = {
-            'User-Agent': user_agent,
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none',
-            'Sec-Fetch-User': '?1',
-            'Cache-Control': 'max-age=0',
-            'DNT': '1',
-            'Referer': 'https://otzovik.com/',
-        }
+        # Повторы на транспортном уровне: сетевые ошибки и 429/503
+        # с нарастающей паузой и учетом заголовка Retry-After
+        retry = Retry(
+            total=self.config.MAX_RETRIES,
+            status_forcelist=[429, 503],
+            backoff_factor=1.0,
+            respect_retry_after_header=True,
+            allowed_methods=['GET'],
+            raise_on_status=False,
+        )
 
-        session.headers.update(headers)
+        # Один расширенный пул соединений: TCP+TLS переиспользуются всеми
+        # запросами, в том числе из параллельных потоков загрузки отелей
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=retry)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+
+        # Заголовки браузера и случайный User-Agent
+        session.headers.update(_DEFAULT_HEADERS)
+        session.headers['User-Agent'] = self.config.pick_user_agent()
 
         # Добавляем cookies для имитации реального пользователя
         session.cookies.update({
@@ -111,89 +251,221 @@ class OtzyovikParser:
 
         return session
 
-    def _random_delay(self, min_delay=None, max_delay=None):
-        """Случайная задержка между запросами"""
-        min_val = min_delay or self.config.DELAY_MIN
-        max_val = max_delay or self.config.DELAY_MAX
-        delay = random.uniform(min_val, max_val)
-        time.sleep(delay)
-
-    def _is_blocked_response(self, response):
-        """Проверка, заблокирован ли доступ"""
-        if not response:
+    def _defer_next_request(self, delay: float):
+        """Следующий запрос (любого потока) - не раньше чем через delay сек"""
+        with self._rate_lock:
+            self._next_request_time = max(self._next_request_time, time.monotonic() + delay)
+
+    def _wait_request_slot(self, pause: float = 0.0):
+        """Резервирование момента запроса в общем расписании и ожидание его"""
+        # Запросы всех потоков идут через одно расписание: каждый занимает
+        # свой момент, следующий сдвигается на полные DELAY_MIN..MAX, так что
+        # общий темп не зависит от числа потоков - потоки лишь совмещают
+        # с ожиданием сетевой обмен и разбор. pause - добавочная пауза перед
+        # этим запросом (между отелями). Спим только остаток
+        with self._rate_lock:
+            now = time.monotonic()
+            start = max(now, self._next_request_time + pause)
+            self._next_request_time = start + random.uniform(self.config.DELAY_MIN, self.config.DELAY_MAX)
+
+        if start > now:
+            time.sleep(start - now)
+
+    def _is_blocked_response(self, response, body: bytes):
+        """Проверка, заблокирован ли доступ (body - уже распакованное тело ответа)"""
+        # Response.__bool__ - это .ok: ответ 403 ложен, сравниваем с None
+        if response is None:
             return False
 
-        # Проверка кодов состояния
-        if response.status_code in [403, 429, 503]:
+        # Проверка кода состояния (429/503 повторяет Retry адаптера сессии)
+        if response.status_code == 403:
             return True
 
-        # Проверка содержимого на признаки блокировки
-        if response.text:
-            text_lower = response.text.lower()
-            block_indicators = [
-                'captcha', 'recaptcha', 'cloudflare', 'доступ ограничен',
-                'your access has been blocked', 'blocked', '403 forbidden',
-                'too many requests', 'rate limit exceeded'
-            ]
-
-            if any(indicator in text_lower for indicator in block_indicators):
+        if body:
+            # Слишком короткий ответ подозрителен - дешевая проверка идет первой
+            if len(body) < 1000 and b'product-list' not in body:
                 return True
 
-            # Слишком короткий ответ тоже подозрителен
-            if len(response.text) < 1000 and 'product-list' not in response.text:
+            # Проверка содержимого на признаки блокировки
+            if _RE_BLOCKED.search(body):
                 return True
 
         return False
 
     def _load_progress(self):
         """Загрузка прогресса из файла"""
-        if os.path.exists(self.config.PROGRESS_FILE):
+        # Если сбой пришелся между двумя заменами в _write_progress_snapshot, остается только .bak
+        progress_file = self.config.PROGRESS_FILE
+        if not os.path.exists(progress_file):
+            progress_file += '.bak'
+
+        if os.path.exists(progress_file):
             try:
-                with open(self.config.PROGRESS_FILE, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                with open(progress_file, 'rb') as f:
+                    data = orjson.loads(f.read())
 
                     self.processed_hotels = set(data.get('processed_hotels', []))
                     self.processed_pages = set(data.get('processed_pages', []))
-                    self.results = data.get('results', [])
                     self.total_requests = data.get('total_requests', 0)
                     self.blocked_count = data.get('blocked_count', 0)
+                    self._dropped_before_2020 = data.get('dropped_before_2020', 0)
 
-                self.logger.info(f"Загружен прогресс: {len(self.processed_pages)} страниц, "
-                                 f"{len(self.processed_hotels)} отелей, {len(self.results)} отзывов")
+                # Прогресс старого формата хранил отзывы внутри себя - переносим их в JSONL
+                legacy_results = data.get('results')
+                if legacy_results and not os.path.exists(self.results_log):
+                    with open(self.results_log, 'wb') as f:
+                        for review in legacy_results:
+                            f.write(orjson.dumps(review) + b'\n')
 
             except Exception as e:
                 self.logger.error(f"Ошибка загрузки прогресса: {e}")
                 print(f"⚠️  Не удалось загрузить прогресс: {e}")
 
-    def _save_progress(self):
-        """Сохранение прогресса в файл"""
         try:
-            data = {
-                'processed_hotels': list(self.processed_hotels),
-                'processed_pages': list(self.processed_pages),
-                'results': self.results,
+            self._replay_progress_log()
+            self._load_results_log()
+
+            if self.processed_pages or self.processed_hotels or self._review_rows:
+                self.logger.info(f"Загружен прогресс: {len(self.processed_pages)} страниц, "
+                                 f"{len(self.processed_hotels)} отелей, {len(self._review_rows)} отзывов")
+
+        except Exception as e:
+            self.logger.error(f"Ошибка загрузки прогресса: {e}")
+            print(f"⚠️  Не удалось загрузить прогресс: {e}")
+
+    def _replay_progress_log(self):
+        """Применение к снимку записей журнала прогресса"""
+        if not os.path.exists(self.progress_log):
+            return
+
+        valid_end = 0
+        with open(self.progress_log, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # Оборванная последняя строка после аварийного завершения
+                    break
+                valid_end += len(line)
+                try:
+                    entry = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    self.logger.warning(f"Пропущена поврежденная строка в {self.progress_log}")
+                    continue
+
+                if 'hotel' in entry:
+                    self.processed_hotels.add(entry['hotel'])
+                elif 'page' in entry:
+                    self.processed_pages.add(entry['page'])
+                else:
+                    # Счетчики только растут: после сбоя при сворачивании
+                    # журнал может оказаться старше снимка
+                    self.total_requests = max(self.total_requests, entry.get('total_requests', 0))
+                    self.blocked_count = max(self.blocked_count, entry.get('blocked_count', 0))
+                    self._dropped_before_2020 = max(self._dropped_before_2020,
+                                                    entry.get('dropped_before_2020', 0))
+                self._progress_log_entries += 1
+
+        # Обрывок отрезаем, иначе следующая запись журнала допишется к нему
+        if valid_end < os.path.getsize(self.progress_log):
+            self.logger.warning(f"Отброшена оборванная последняя строка в {self.progress_log}")
+            os.truncate(self.progress_log, valid_end)
+
+    def _load_results_log(self):
+        """Чтение ранее собранных отзывов из JSONL"""
+        if not os.path.exists(self.results_log):
+            return
+
+        valid_end = 0
+
+        def read_reviews(f):
+            # Строки разбираются по одной и сразу учитываются в _add_results:
+            # весь журнал в памяти не собирается
+            nonlocal valid_end
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # Оборванная последняя строка после аварийного завершения
+                    break
+                valid_end += len(line)
+                try:
+                    yield orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    self.logger.warning(f"Пропущена поврежденная строка в {self.results_log}")
+
+        with open(self.results_log, 'rb') as f:
+            self._add_results(read_reviews(f))
+
+        # Обрывок отрезаем, чтобы новые записи начинались с новой строки
+        if valid_end < os.path.getsize(self.results_log):
+            self.logger.warning(f"Отброшена оборванная последняя строка в {self.results_log}")
+            os.truncate(self.results_log, valid_end)
+
+    def _add_results(self, reviews: Iterable[Dict[str, Any]]):
+        """Учет отзывов, записанных в журнал в том же порядке"""
+        rows = self._review_rows
+        seq = self._results_seq
+        rating_sum, rating_count = self._rating_sum, self._rating_count
+        before_2020_count = self._before_2020_count
+
+        for review in reviews:
+            review_id = review.get('review_id')
+            old = rows.get(review_id)
+            if old is not None:
+                # Отзыв уже собран ранее - оставляем последнюю версию,
+                # предварительно убрав старую из итогов
+                _, old_rating, old_before_2020 = old
+                if old_rating:
+                    rating_sum -= old_rating
+                    rating_count -= 1
+                if old_before_2020:
+                    before_2020_count -= 1
+
+            rating = review.get('review_rating_numeric')
+            before_2020 = bool(review.get('before_2020'))
+            rows[review_id] = (seq, rating, before_2020)
+            seq += 1
+
+            if rating:
+                rating_sum += rating
+                rating_count += 1
+            if before_2020:
+                before_2020_count += 1
+
+        self._results_seq = seq
+        self._rating_sum, self._rating_count = rating_sum, rating_count
+        self._before_2020_count = before_2020_count
+
+    def _append_results(self, reviews: List[Dict[str, Any]]):
+        """Дозапись отзывов в JSONL"""
+        write = self._results_fp.write
+        for review in reviews:
+            write(orjson.dumps(review) + b'\n')
+
+    def _mark_hotel_processed(self, url: str):
+        """Отель обработан - запись в журнал прогресса"""
+        self.processed_hotels.add(url)
+        self._progress_fp.write(orjson.dumps({'hotel': url}) + b'\n')
+        self._progress_log_entries += 1
+
+    def _mark_page_processed(self, page_num: int):
+        """Страница обработана - запись в журнал прогресса"""
+        self.processed_pages.add(page_num)
+        self._progress_fp.write(orjson.dumps({'page': page_num}) + b'\n')
+        self._progress_log_entries += 1
+
+    def _save_progress(self, compact: bool = False):
+        """Контрольная точка прогресса (compact - свернуть журнал в снимок)"""
+        try:
+            # Отзывы должны оказаться на диске раньше, чем отели попадут в прогресс
+            self._results_fp.flush()
+            self._progress_fp.write(orjson.dumps({
                 'total_requests': self.total_requests,
                 'blocked_count': self.blocked_count,
-                'last_updated': datetime.now().isoformat(),
-                'parser_version': '3.2',  # Обновили версию
-                'delays_config': {
-                    'DELAY_MIN': self.config.DELAY_MIN,
-                    'DELAY_MAX': self.config.DELAY_MAX,
-                    'DELAY_BETWEEN_HOTELS_MIN': self.config.DELAY_BETWEEN_HOTELS_MIN,
-                    'DELAY_BETWEEN_HOTELS_MAX': self.config.DELAY_BETWEEN_HOTELS_MAX,
-                    'DELAY_BETWEEN_PAGES_MIN': self.config.DELAY_BETWEEN_PAGES_MIN,
-                    'DELAY_BETWEEN_PAGES_MAX': self.config.DELAY_BETWEEN_PAGES_MAX,
-                    'DELAY_AFTER_BLOCK': self.config.DELAY_AFTER_BLOCK
-                }
-            }
-
-            with open(self.config.PROGRESS_FILE, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+                'dropped_before_2020': self._dropped_before_2020,
+            }) + b'\n')
+            self._progress_fp.flush()
+            self._progress_log_entries += 1
 
-            # Резервная копия
-            backup_file = f"data/progress_backup_{int(time.time())}.json"
-            with open(backup_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            if compact or self._progress_log_entries >= _PROGRESS_COMPACT_EVERY:
+                self._write_progress_snapshot()
 
             self.logger.debug("Прогресс сохранен")
 
@@ -201,93 +473,186 @@ class OtzyovikParser:
             self.logger.error(f"Ошибка сохранения прогресса: {e}")
             print(f"⚠️  Ошибка сохранения прогресса: {e}")
 
+    def _write_progress_snapshot(self):
+        """Полный снимок прогресса и очистка журнала"""
+        data = {
+            'processed_hotels': list(self.processed_hotels),
+            'processed_pages': list(self.processed_pages),
+            'total_requests': self.total_requests,
+            'blocked_count': self.blocked_count,
+            'dropped_before_2020': self._dropped_before_2020,
+            'last_updated': datetime.now().isoformat(),
+            'parser_version': '3.2',  # Обновили версию
+            'delays_config': {
+                'DELAY_MIN': self.config.DELAY_MIN,
+                'DELAY_MAX': self.config.DELAY_MAX,
+                'DELAY_BETWEEN_HOTELS_MIN': self.config.DELAY_BETWEEN_HOTELS_MIN,
+                'DELAY_BETWEEN_HOTELS_MAX': self.config.DELAY_BETWEEN_HOTELS_MAX,
+                'DELAY_BETWEEN_PAGES_MIN': self.config.DELAY_BETWEEN_PAGES_MIN,
+                'DELAY_BETWEEN_PAGES_MAX': self.config.DELAY_BETWEEN_PAGES_MAX,
+                'DELAY_AFTER_BLOCK': self.config.DELAY_AFTER_BLOCK
+            }
+        }
+
+        # Запись во временный файл и атомарная замена; предыдущая версия
+        # остается единственной резервной копией .bak.
+        # Без отступов: основной объем файла - список URL обработанных отелей
+        progress_file = self.config.PROGRESS_FILE
+        tmp_file = progress_file + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            f.write(orjson.dumps(data))
+        if os.path.exists(progress_file):
+            os.replace(progress_file, progress_file + '.bak')
+        os.replace(tmp_file, progress_file)
+
+        # Снимок уже на диске - записанное в журнал в него вошло
+        self._progress_fp.truncate(0)
+        self._progress_log_entries = 0
+
     def _save_results(self):
         """Сохранение результатов в CSV и JSON"""
-        if not self.results:
+        if not self._review_rows:
             self.logger.warning("Нет данных для сохранения")
             return
 
         try:
-            df = pd.DataFrame(self.results)
-
-            # Удаляем дубликаты по ID отзыва
-            if 'review_id' in df.columns:
-                initial_count = len(df)
-                df = df.drop_duplicates(subset=['review_id'], keep='last')
-                removed = initial_count - len(df)
-                if removed > 0:
-                    self.logger.info(f"Удалено {removed} дубликатов отзывов")
-
-            # Анализ признака "до 2020"
-            if 'before_2020' in df.columns:
-                before_2020_count = df['before_2020'].sum() if df['before_2020'].dtype == 'bool' else 0
-                self.logger.info(
-                    f"Отзывов до 2020 года: {before_2020_count} ({before_2020_count / len(df) * 100:.1f}%)")
-
-            # Анализ оценок отзывов
-            if 'review_rating_numeric' in df.columns:
-                avg_rating = df['review_rating_numeric'].mean()
-                self.logger.info(f"Средняя оценка отзывов: {avg_rating:.2f}")
-
-            # Сохраняем в CSV
-            csv_path = self.config.OUTPUT_FILE
-            df.to_csv(csv_path, index=False, encoding='utf-8-sig')
+            review_count = len(self._review_rows)
+
+            # Анализ признака "до 2020" и оценок - по накопленным итогам
+            self.logger.info(
+                f"Отзывов до 2020 года в результатах: {self._before_2020_count} "
+                f"({self._before_2020_count / review_count * 100:.1f}%)")
+            avg_rating = self._rating_sum / self._rating_count if self._rating_count else 0
+            self.logger.info(f"Средняя оценка отзывов: {avg_rating:.2f}")
 
-            # Также сохраняем в JSON для удобства
+            # CSV (utf-8-sig - чтобы Excel распознал кодировку) и JSON
+            # собираются одним потоковым проходом по журналу отзывов
+            csv_path = self.config.OUTPUT_FILE
             json_path = csv_path.replace('.csv', '.json')
-            df.to_json(json_path, orient='records', force_ascii=False, indent=2)
+            self._results_fp.flush()
+            self._export_results(csv_path, json_path)
 
-            self.logger.info(f"Сохранено {len(df)} отзывов в {csv_path} и {json_path}")
-            print(f"💾 Сохранено {len(df)} отзывов")
+            self.logger.info(f"Сохранено {review_count} отзывов в {csv_path} и {json_path}")
+            print(f"💾 Сохранено {review_count} отзывов")
 
         except Exception as e:
             self.logger.error(f"Ошибка сохранения результатов: {e}")
             print(f"⚠️  Ошибка сохранения результатов: {e}")
 
-    def make_request(self, url: str, referer: Optional[str] = None, retry_count: int = 0):
+    def _export_results(self, csv_path: str, json_path: str):
+        """Выгрузка последних версий отзывов из журнала в CSV и JSON"""
+        rows = self._review_rows
+        seq = 0
+        sep = b'\n'
+
+        with open(self.results_log, 'rb') as src, \
+                open(csv_path, 'w', newline='', encoding='utf-8-sig') as csv_f, \
+                open(json_path, 'wb') as json_f:
+            writer = csv.writer(csv_f, lineterminator='\n')
+            writer.writerow(REVIEW_FIELDS)
+            json_f.write(b'[')
+
+            for line in src:
+                # Строки пропускаются по тому же правилу, что и при загрузке,
+                # поэтому номера записей совпадают с учтенными в _add_results
+                try:
+                    review = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    continue
+
+                entry = rows.get(review.get('review_id'))
+                is_last = entry is not None and entry[0] == seq
+                seq += 1
+                if not is_last:
+                    continue
+
+                record = {name: review.get(name) for name in REVIEW_FIELDS}
+                writer.writerow(record.values())
+                item = orjson.dumps(record, option=orjson.OPT_INDENT_2)
+                json_f.write(sep + b'  ' + item.replace(b'\n', b'\n  '))
+                sep = b',\n'
+
+            json_f.write(b'\n]')
+
+    def make_request(self, url: str, referer: Optional[str] = None, pause: float = 0.0):
         """Выполнение HTTP-запроса с обработкой ошибок"""
-        self.total_requests += 1
+        # Задержка перед запросом - один раз, повторы ждут только свою паузу
+        self._wait_request_slot(pause)
 
-        # Задержка перед запросом (1-2 сек)
-        self._random_delay()
+        # Referer и сменный User-Agent передаются в самом запросе:
+        # сессию делят несколько потоков, ее заголовки не меняются
+        headers = {}
+        if referer:
+            headers['Referer'] = referer
 
-        try:
-            # Обновляем Referer если указан
-            if referer:
-                self.session.headers['Referer'] = referer
+        # Сетевые ошибки и ответы 429/503 повторяет только Retry адаптера сессии,
+        # здесь остаются повторы при распознанной блокировке (403 и признаки в теле)
+        for retry_count in range(self.config.MAX_RETRIES + 1):
+            with self._counters_lock:
+                self.total_requests += 1
+
+            try:
+                # Делаем запрос с таймаутом из конфигурации
+                response = self.session.get(url, headers=headers, timeout=self.config.TIMEOUT)
+
+            except requests.exceptions.Timeout:
+                self.logger.warning(f"Таймаут при запросе к {url}")
+                return None
+
+            except requests.exceptions.RequestException as e:
+                self.logger.error(f"Ошибка сети при запросе к {url}: {e}")
+                return None
+
+            # Повторы, сделанные Retry, - тоже запросы к сайту
+            retries = getattr(response.raw, 'retries', None)
+            if retries is not None and retries.history:
+                with self._counters_lock:
+                    self.total_requests += len(retries.history)
+
+            # 429/503 после исчерпания повторов Retry - второй круг повторов не нужен
+            if response.status_code in (429, 503):
+                with self._counters_lock:
+                    self.blocked_count += 1
+                self.logger.warning(f"HTTP {response.status_code} от {url} после повторов, пропускаем")
+                return None
 
-            # Делаем запрос с таймаутом из конфигурации
-            response = self.session.get(url, timeout=self.config.TIMEOUT)
+            # Тело остается байтами: lexbor разбирает UTF-8 сам, а проверка
+            # блокировки ищет признаки прямо в байтах - декодировать в str не нужно
+            body = response.content
+            if not self._compression_logged:
+                self._log_compression(response, body)
 
             # Проверяем на блокировку
-            if self._is_blocked_response(response):
-                self.blocked_count += 1
+            if self._is_blocked_response(response, body):
+                with self._counters_lock:
+                    self.blocked_count += 1
                 self.logger.warning(f"Обнаружена блокировка при запросе к {url}")
 
                 if retry_count < self.config.MAX_RETRIES:
                     wait_time = self.config.DELAY_AFTER_BLOCK * (retry_count + 1)
                     self.logger.info(f"Повторная попытка через {wait_time} сек...")
-                    time.sleep(wait_time)
+                    # Пауза общая: блокировка касается всех потоков, и повтор
+                    # тоже занимает свой момент в расписании
+                    self._defer_next_request(wait_time)
+                    self._wait_request_slot()
 
                     # Меняем User-Agent для обхода блокировки
-                    new_agent = random.choice(self.config.USER_AGENTS)
-                    self.session.headers['User-Agent'] = new_agent
+                    headers['User-Agent'] = self.config.pick_user_agent()
+                    continue
 
-                    return self.make_request(url, referer, retry_count + 1)
-                else:
-                    self.logger.error(f"Превышено максимальное количество попыток для {url}")
-                    return None
+                self.logger.error(f"Превышено максимальное количество попыток для {url}")
+                return None
 
             # Проверяем статус ответа
             if response.status_code == 200:
                 # Проверяем, что это HTML и содержит данные
                 if ('text/html' in response.headers.get('Content-Type', '') and
-                        len(response.text) > 1000):
-                    return response.text
+                        len(body) > 1000):
+                    return body
                 else:
                     self.logger.warning(f"Невалидный ответ от {url}: "
                                         f"тип={response.headers.get('Content-Type')}, "
-                                        f"размер={len(response.text)}")
+                                        f"размер={len(body)}")
                     return None
 
             elif response.status_code == 404:
@@ -298,19 +663,18 @@ class OtzyovikParser:
                 self.logger.warning(f"HTTP {response.status_code} от {url}")
                 return None
 
-        except requests.exceptions.Timeout:
-            self.logger.warning(f"Таймаут при запросе к {url}")
-            if retry_count < self.config.MAX_RETRIES:
-                time.sleep(2 * (retry_count + 1))  # Уменьшено задержки при таймауте
-                return self.make_request(url, referer, retry_count + 1)
-            return None
+        return None
 
-        except requests.exceptions.RequestException as e:
-            self.logger.error(f"Ошибка сети при запросе к {url}: {e}")
-            if retry_count < self.config.MAX_RETRIES:
-                time.sleep(1 * (retry_count + 1))  # Уменьшено задержки при ошибке сети
-                return self.make_request(url, referer, retry_count + 1)
-            return None
+    def _log_compression(self, response, body: bytes):
+        """Однократная запись в лог степени сжатия ответа"""
+        self._compression_logged = True
+        encoding = response.headers.get('Content-Encoding')
+        wire_size = response.headers.get('Content-Length')
+        if encoding and wire_size and wire_size.isdigit() and int(wire_size):
+            self.logger.info(f"Сжатие ответов: {encoding}, {int(wire_size) / 1024:.0f} КБ -> "
+                             f"{len(body) / 1024:.0f} КБ (x{len(body) / int(wire_size):.1f})")
+        else:
+            self.logger.info(f"Сжатие ответов: {encoding or 'нет'}")
 
     def get_list_page_url(self, page_num: int) -> str:
         """Формирование URL для страницы списка отелей"""
@@ -319,13 +683,15 @@ class OtzyovikParser:
 
         return f"{self.config.BASE_URL}{page_num}/"
 
-    def parse_list_page(self, html: str, page_num: int, page_url: str) -> List[Dict[str, Any]]:
+    def parse_list_page(self, html: bytes, page_num: int, page_url: str) -> List[Dict[str, Any]]:
         """Парсинг страницы со списком отелей"""
-        soup = BeautifulSoup(html, 'html.parser')
+        # Страница списка, как и страница отеля, разбирается lexbor (selectolax)
+        tree = LexborHTMLParser(html)
+        selectors = self.config.SELECTORS_LIST
         hotels = []
 
         # Ищем контейнеры с отелями
-        containers = soup.select(self.config.SELECTORS_LIST['hotel_container'])
+        containers = tree.css(selectors['hotel_container'])
 
         if not containers:
             self.logger.warning(f"На странице {page_num} не найдено отелей")
@@ -336,31 +702,33 @@ class OtzyovikParser:
         for container in containers[:self.config.MAX_HOTELS_PER_PAGE]:
             try:
                 # Ссылка на страницу отеля
-                link_elem = container.select_one(self.config.SELECTORS_LIST['hotel_link'])
-                if not link_elem or not link_elem.get('href'):
+                link_elem = container.css_first(selectors['hotel_link'])
+                hotel_url = link_elem.attributes.get('href') if link_elem else None
+                if not hotel_url:
                     continue
 
                 # Полный URL страницы отеля
-                hotel_url = link_elem['href']
                 if not hotel_url.startswith('http'):
                     hotel_url = urljoin('https://otzovik.com', hotel_url)
 
                 # Название отеля
-                hotel_name = link_elem.text.strip()
+                hotel_name = link_elem.text().strip()
 
                 # Количество отзывов
-                count_elem = container.select_one(self.config.SELECTORS_LIST['reviews_count'])
+                count_elem = container.css_first(selectors['reviews_count'])
                 review_count = 0
                 if count_elem:
-                    match = re.search(r'(\d+)', count_elem.text)
+                    # Счетчик обычно - прямой текст элемента, обход потомков не нужен
+                    match = _RE_COUNT.search(count_elem.text(deep=False) or count_elem.text())
                     review_count = int(match.group()) if match else 0
 
                 # Рейтинг отеля
-                rating_elem = container.select_one(self.config.SELECTORS_LIST['rating'])
-                hotel_rating = rating_elem.text.strip() if rating_elem else 'Нет'
+                rating_elem = container.css_first(selectors['rating'])
+                hotel_rating = rating_elem.text().strip() if rating_elem else 'Нет'
 
-                # ID отеля (генерируем из URL)
-                hotel_id = f"hotel_{abs(hash(hotel_url)) % 1000000:06d}"
+                # ID отеля (генерируем из URL). blake2b, в отличие от hash(),
+                # не зависит от PYTHONHASHSEED и стабилен между запусками
+                hotel_id = 'hotel_' + hashlib.blake2b(hotel_url.encode('utf-8'), digest_size=3).hexdigest()
 
                 hotels.append({
                     'id': hotel_id,
@@ -388,15 +756,18 @@ class OtzyovikParser:
             'month': '',
             'day': ''
         }
+        selectors = self.config.SELECTORS_HOTEL
 
         try:
             # Способ 1: Из элемента с классом review-postdate
-            date_elem = review_item.select_one(self.config.SELECTORS_HOTEL['review_date'])
+            date_elem = review_item.css_first(selectors['review_date'])
 
             if date_elem:
+                date_attrs = date_elem.attributes
+
                 # Пробуем взять из атрибута content (ISO формат)
-                if date_elem.has_attr('content'):
-                    date_raw = date_elem['content']
+                if 'content' in date_attrs:
+                    date_raw = date_attrs['content'] or ''
                     date_data['raw'] = date_raw
 
                     # Пробуем преобразовать в datetime
@@ -411,46 +782,28 @@ class OtzyovikParser:
                         date_data['month'] = f"{dt.month:02d}"
                         date_data['day'] = f"{dt.day:02d}"
                     except ValueError:
-                        date_data['display'] = date_elem.text.strip()
+                        date_data['display'] = date_elem.text().strip()
 
                 # Если нет content, берем текст
-                elif date_elem.text:
-                    date_text = date_elem.text.strip()
+                elif date_elem.text():
+                    date_text = date_elem.text().strip()
                     date_data['display'] = date_text
 
                     # Пробуем извлечь дату из текста
-                    date_patterns = [
-                        r'(\d{1,2})\s+([а-я]+)\s+(\d{4})',  # 8 окт 2025
-                        r'(\d{1,2})\.(\d{1,2})\.(\d{4})',  # 08.10.2025
-                        r'(\d{4})-(\d{1,2})-(\d{1,2})',  # 2025-10-08
-                    ]
-
-                    for pattern in date_patterns:
-                        match = re.search(pattern, date_text, re.IGNORECASE)
+                    for pattern, handler in _DATE_PATTERNS:
+                        match = pattern.search(date_text)
                         if match:
                             date_data['raw'] = date_text
                             # Пробуем преобразовать найденную дату
-                            if pattern == r'(\d{1,2})\s+([а-я]+)\s+(\d{4})':
-                                day, month_ru, year = match.groups()
-                                # Преобразуем русские названия месяцев
-                                months_ru = {
-                                    'января': '01', 'февраля': '02', 'марта': '03',
-                                    'апреля': '04', 'мая': '05', 'июня': '06',
-                                    'июля': '07', 'августа': '08', 'сентября': '09',
-                                    'октября': '10', 'ноября': '11', 'декабря': '12'
-                                }
-                                month = months_ru.get(month_ru.lower(), '01')
-                                date_data['year'] = year
-                                date_data['month'] = month
-                                date_data['day'] = f"{int(day):02d}"
-                                date_data['display'] = f"{day}.{month}.{year}"
+                            if handler:
+                                handler(match, date_data)
                             break
 
             # Способ 2: Из meta-тега с itemprop="datePublished"
             if not date_data['display']:
-                meta_elem = review_item.select_one(self.config.SELECTORS_HOTEL['review_date_meta'])
-                if meta_elem and meta_elem.has_attr('content'):
-                    date_raw = meta_elem['content']
+                meta_elem = review_item.css_first(selectors['review_date_meta'])
+                if meta_elem and 'content' in meta_elem.attributes:
+                    date_raw = meta_elem.attributes['content'] or ''
                     date_data['raw'] = date_raw
 
                     try:
@@ -468,26 +821,11 @@ class OtzyovikParser:
 
             # Способ 3: Ищем дату в тексте отзыва
             if not date_data['display']:
-                # Пробуем найти дату в любом месте
-                for elem in review_item.find_all(text=True):
-                    text = elem.string if elem else ''
-                    if text:
-                        # Ищем паттерны дат
-                        patterns = [
-                            r'\d{1,2}\s+[а-я]+\s+\d{4}',
-                            r'\d{1,2}\.\d{1,2}\.\d{4}',
-                            r'\d{4}-\d{1,2}-\d{1,2}',
-                        ]
-
-                        for pattern in patterns:
-                            match = re.search(pattern, text, re.IGNORECASE)
-                            if match:
-                                date_data['display'] = match.group()
-                                date_data['raw'] = match.group()
-                                break
-
-                    if date_data['display']:
-                        break
+                # Пробуем найти дату в любом месте: один поиск по всему тексту
+                match = _RE_DATE_ANY.search(review_item.text(separator=' ', strip=True))
+                if match:
+                    date_data['display'] = match.group()
+                    date_data['raw'] = match.group()
 
         except Exception as e:
             self.logger.error(f"Ошибка извлечения даты: {e}")
@@ -504,15 +842,15 @@ class OtzyovikParser:
 
         try:
             # Ищем элемент с оценкой отзыва
-            rating_elem = review_item.select_one(self.config.SELECTORS_HOTEL['review_rating'])
+            rating_elem = review_item.css_first(self.config.SELECTORS_HOTEL['review_rating'])
 
             if rating_elem:
-                rating_text = rating_elem.text.strip()
+                rating_text = rating_elem.text().strip()
                 rating_data['text'] = rating_text
 
                 # Пробуем извлечь числовую оценку
                 # Форматы: "5,0", "4,5", "5" и т.д.
-                match = re.search(r'(\d+)[,\.]?(\d*)', rating_text.replace(',', '.'))
+                match = _RE_RATING.search(rating_text.replace(',', '.'))
                 if match:
                     if match.group(2):  # Есть дробная часть
                         rating_num = float(f"{match.group(1)}.{match.group(2)}")
@@ -521,30 +859,23 @@ class OtzyovikParser:
 
                     rating_data['numeric'] = rating_num
 
-                    # Определяем количество звезд (округление до 0.5)
-                    if rating_num >= 4.5:
-                        rating_data['stars'] = 5
-                    elif rating_num >= 3.5:
-                        rating_data['stars'] = 4
-                    elif rating_num >= 2.5:
-                        rating_data['stars'] = 3
-                    elif rating_num >= 1.5:
-                        rating_data['stars'] = 2
-                    else:
-                        rating_data['stars'] = 1
+                    # Определяем количество звезд (округление до 0.5) двоичным поиском по границам
+                    rating_data['stars'] = bisect_right(_STAR_THRESHOLDS, rating_num) + 1
 
         except Exception as e:
             self.logger.error(f"Ошибка извлечения оценки: {e}")
 
         return rating_data
 
-    def parse_hotel_page(self, html: str, hotel_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def parse_hotel_page(self, html: bytes, hotel_data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Парсинг страницы отеля с отзывами"""
-        soup = BeautifulSoup(html, 'html.parser')
+        # Страница отеля разбирается C-парсером lexbor (selectolax)
+        tree = LexborHTMLParser(html)
+        selectors = self.config.SELECTORS_HOTEL
         reviews = []
 
         # Ищем все отзывы на странице
-        review_items = soup.select(self.config.SELECTORS_HOTEL['review_item'])
+        review_items = tree.css(selectors['review_item'])
 
         if not review_items:
             self.logger.info(f"На странице отеля '{hotel_data['name']}' не найдено отзывов")
@@ -552,6 +883,19 @@ class OtzyovikParser:
 
         self.logger.info(f"На странице отеля '{hotel_data['name']}' найдено {len(review_items)} отзывов")
 
+        # Инварианты цикла: селекторы в локальных переменных и одна отметка
+        # времени сбора на всю страницу отеля
+        sel_title = selectors['review_title']
+        sel_teaser = selectors['review_teaser']
+        sel_plus = selectors['review_plus']
+        sel_minus = selectors['review_minus']
+        sel_author = selectors['review_author']
+        sel_location = selectors['review_author_location']
+        sel_recommendations = selectors['review_recommendations']
+        sel_comments = selectors['review_comments']
+        sel_images = selectors['review_images']
+        scraped_at = datetime.now().isoformat()
+
         for idx, item in enumerate(review_items[:self.config.MAX_REVIEWS_PER_HOTEL], 1):
             try:
                 # ============ ИЗВЛЕЧЕНИЕ ОЦЕНКИ ОТЗЫВА ============
@@ -563,69 +907,69 @@ class OtzyovikParser:
                 # ============ ИЗВЛЕЧЕНИЕ ДАТЫ ОТЗЫВА ============
                 date_data = self.extract_review_date(item)
 
-                # Признак "до 2020"
-                before_2020 = False
-                if date_data['year'] and date_data['year'].isdigit():
-                    year = int(date_data['year'])
-                    before_2020 = year < 2020
+                # Признак "до 2020" (год - строка, '' если дата не найдена)
+                year = date_data['year']
+                before_2020 = year.isdigit() and int(year) < _BEFORE_YEAR
 
                 if date_data['display']:
                     self.logger.debug(f"Отзыв {idx}: дата '{date_data['display']}', до 2020: {before_2020}")
 
                 # Заголовок отзыва
-                title_elem = item.select_one(self.config.SELECTORS_HOTEL['review_title'])
-                title = title_elem.text.strip() if title_elem else ''
+                title_elem = item.css_first(sel_title)
+                title = title_elem.text().strip() if title_elem else ''
 
                 # Текст отзыва (краткий)
-                teaser_elem = item.select_one(self.config.SELECTORS_HOTEL['review_teaser'])
-                teaser = teaser_elem.text.strip() if teaser_elem else ''
+                teaser_elem = item.css_first(sel_teaser)
+                teaser = teaser_elem.text().strip() if teaser_elem else ''
 
                 # Достоинства
-                plus_elem = item.select_one(self.config.SELECTORS_HOTEL['review_plus'])
+                plus_elem = item.css_first(sel_plus)
                 plus_text = ''
                 if plus_elem:
-                    plus_text = plus_elem.text.strip()
+                    plus_text = plus_elem.text().strip()
                     if plus_text.startswith('Достоинства:'):
                         plus_text = plus_text[12:].strip()
 
                 # Недостатки
-                minus_elem = item.select_one(self.config.SELECTORS_HOTEL['review_minus'])
+                minus_elem = item.css_first(sel_minus)
                 minus_text = ''
                 if minus_elem:
-                    minus_text = minus_elem.text.strip()
+                    minus_text = minus_elem.text().strip()
                     if minus_text.startswith('Недостатки:'):
                         minus_text = minus_text[11:].strip()
 
                 # Автор отзыва
-                author_elem = item.select_one(self.config.SELECTORS_HOTEL['review_author'])
-                author = author_elem.text.strip() if author_elem else ''
+                author_elem = item.css_first(sel_author)
+                author = author_elem.text().strip() if author_elem else ''
 
                 # Местоположение автора
-                location_elem = item.select_one(self.config.SELECTORS_HOTEL['review_author_location'])
-                location = location_elem.text.strip() if location_elem else ''
+                location_elem = item.css_first(sel_location)
+                location = location_elem.text().strip() if location_elem else ''
 
                 # Количество рекомендаций (лайков)
-                rec_elem = item.select_one(self.config.SELECTORS_HOTEL['review_recommendations'])
+                rec_elem = item.css_first(sel_recommendations)
                 recommendations = 0
                 if rec_elem:
-                    rec_text = rec_elem.text.strip()
+                    # Число - прямой текст листового <span>, без обхода поддерева
+                    rec_text = rec_elem.text(deep=False, strip=True) or rec_elem.text().strip()
                     if rec_text.isdigit():
                         recommendations = int(rec_text)
 
                 # Количество комментариев
-                comments_elem = item.select_one(self.config.SELECTORS_HOTEL['review_comments'])
+                comments_elem = item.css_first(sel_comments)
                 comments = 0
                 if comments_elem:
-                    comments_text = comments_elem.text.strip()
+                    comments_text = comments_elem.text(deep=False, strip=True) or comments_elem.text().strip()
                     if comments_text.isdigit():
                         comments = int(comments_text)
 
                 # Изображения в отзыве
-                image_elems = item.select(self.config.SELECTORS_HOTEL['review_images'])
+                image_elems = item.css(sel_images)
                 images = []
                 for img in image_elems:
-                    if img.get('src'):
-                        images.append(img['src'])
+                    src = img.attributes.get('src')
+                    if src:
+                        images.append(src)
 
                 # Формируем полный текст отзыва
                 text_parts = []
@@ -641,7 +985,11 @@ class OtzyovikParser:
                 full_text = '\n\n'.join(text_parts) if text_parts else ''
 
                 # Генерируем уникальный ID отзыва
-                review_id = f"{hotel_data['id']}_review_{idx}_{abs(hash(title + date_data['display'])) % 10000:04d}"
+                # Хэш дописывается по частям, без промежуточной строки title + дата;
+                # результат тот же, что у хэша склейки, поэтому ID не меняются
+                review_hash = hashlib.blake2b(title.encode('utf-8'), digest_size=2)
+                review_hash.update(date_data['display'].encode('utf-8'))
+                review_id = f"{hotel_data['id']}_review_{idx}_{review_hash.hexdigest()}"
 
                 # Собираем данные отзыва
                 review = {
@@ -686,7 +1034,7 @@ class OtzyovikParser:
 
                     # Мета-данные
                     'list_page': hotel_data['list_page'],
-                    'scraped_at': datetime.now().isoformat(),
+                    'scraped_at': scraped_at,
                 }
 
                 reviews.append(review)
@@ -697,6 +1045,15 @@ class OtzyovikParser:
 
         return reviews
 
+    def _fetch_hotel_reviews(self, hotel: Dict[str, Any], page_url: str,
+                             pause: float) -> Optional[List[Dict[str, Any]]]:
+        """Загрузка и разбор страницы отеля в рабочем потоке (None - не загрузилась)"""
+        hotel_html = self.make_request(hotel['url'], referer=page_url, pause=pause)
+        if not hotel_html:
+            return None
+
+        return self.parse_hotel_page(hotel_html, hotel)
+
     def scrape_page(self, page_num: int) -> bool:
         """Сбор данных с одной страницы списка отелей"""
         if page_num in self.processed_pages:
@@ -724,7 +1081,7 @@ class OtzyovikParser:
 
         if not hotels:
             self.logger.warning(f"На странице {page_num} не найдено отелей")
-            self.processed_pages.add(page_num)
+            self._mark_page_processed(page_num)
             self._save_progress()
             return True
 
@@ -734,82 +1091,129 @@ class OtzyovikParser:
         total_reviews_collected = 0
         total_before_2020 = 0
 
-        # Обрабатываем каждый отель
-        for i, hotel in enumerate(hotels, 1):
-            print(f"   {i:2d}/{len(hotels)}: {hotel['name'][:50]}...", end=' ')
-
-            # Пропускаем уже обработанные отели
-            if hotel['url'] in self.processed_hotels:
-                print("⏭️ уже обработан")
-                continue
-
-            # Пропускаем отели без отзывов
-            if hotel['reviews_count'] == 0:
-                print("📭 нет отзывов")
-                self.processed_hotels.add(hotel['url'])
-                continue
-
-            print(f"({hotel['reviews_count']} отзывов)")
-
-            # Загружаем страницу отеля
-            hotel_html = self.make_request(hotel['url'], referer=page_url)
-
-            if not hotel_html:
-                print(f"      ❌ Не удалось загрузить страницу отеля")
-                continue
-
-            # Парсим отзывы на странице отеля
-            reviews = self.parse_hotel_page(hotel_html, hotel)
-
-            if reviews:
-                self.results.extend(reviews)
-                total_reviews_collected += len(reviews)
-
-                # Считаем отзывы до 2020
-                before_2020_count = sum(1 for r in reviews if r.get('before_2020'))
-                total_before_2020 += before_2020_count
+        # Отбираем отели для загрузки за один проход: уже обработанные
+        # (и повторы на странице) пропускаем, отели без отзывов сразу
+        # помечаем обработанными
+        processed = self.processed_hotels
+        mark_processed = self._mark_hotel_processed
+        pending = []
+        seen = set()
+        skipped_done = 0
+        skipped_empty = 0
+        for hotel in hotels:
+            url = hotel['url']
+            if url in processed or url in seen:
+                skipped_done += 1
+            elif hotel['reviews_count'] == 0:
+                mark_processed(url)
+                skipped_empty += 1
+            else:
+                pending.append((hotel, url))
+                seen.add(url)
 
-                print(f"      ✅ Собрано {len(reviews)} отзывов")
-                print(
-                    f"         📊 Средняя оценка: {sum(r.get('review_rating_numeric', 0) for r in reviews) / len(reviews):.1f}")
-                print(f"         🗓️  До 2020 года: {before_2020_count} отзывов")
+        if skipped_done or skipped_empty:
+            print(f"   ⏭️ Пропущено: уже обработано {skipped_done}, без отзывов {skipped_empty}")
+        processed_this_page = skipped_done + skipped_empty
 
-                # Выводим информацию по первым отзывам
-                for review in reviews[:2]:
-                    rating = review.get('review_rating_numeric', 0)
-                    date = review.get('review_date', 'нет даты')
-                    before_2020 = review.get('before_2020', False)
-                    print(f"         ⭐ {rating:.1f} | {date} | {'до 2020' if before_2020 else 'после 2020'}")
+        # Страницы отелей загружаются параллельно в пуле потоков,
+        # а результаты разбираются по мере готовности
+        concurrency = max(1, self.config.CONCURRENCY)
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='hotel')
+        try:
+            # Паузы между отелями выбираются сразу для всей страницы, в том
+            # числе для первой волны; выдерживаются в общем расписании make_request
+            uniform = random.uniform
+            delay_min = self.config.DELAY_BETWEEN_HOTELS_MIN
+            delay_max = self.config.DELAY_BETWEEN_HOTELS_MAX
+            pauses = [uniform(delay_min, delay_max) for _ in range(len(pending))]
+
+            futures = {}
+            for i, ((hotel, url), pause) in enumerate(zip(pending, pauses), 1):
+                future = executor.submit(self._fetch_hotel_reviews, hotel, page_url, pause)
+                futures[future] = (i, hotel, url)
+
+            # Обрабатываем отели в порядке завершения загрузки.
+            # Вывод по отелю собирается в буфер и пишется одним вызовом
+            write = sys.stdout.write
+            total_pending = len(pending)
+            keep_before_2020 = self.config.KEEP_BEFORE_2020
+            for done, future in enumerate(as_completed(futures), 1):
+                i, hotel, url = futures[future]
+                out = [f"   {i:2d}/{total_pending}: {hotel['name'][:50]}... ({hotel['reviews_count']} отзывов)"]
+
+                reviews = future.result()
+
+                if reviews is None:
+                    out.append(f"      ❌ Не удалось загрузить страницу отеля")
+                    write('\n'.join(out) + '\n')
+                    continue
 
-                if len(reviews) > 2:
-                    print(f"         ... и еще {len(reviews) - 2} отзывов")
-            else:
-                print(f"      ⚠️  Отзывы не найдены")
+                if reviews:
+                    n_reviews = len(reviews)
+
+                    # Оценки и отзывы до 2020 - за один проход (по всем отзывам,
+                    # до отсева старых)
+                    hotel_sum = 0.0
+                    hotel_rated = 0
+                    before_2020_count = 0
+                    for review in reviews:
+                        rating = review.get('review_rating_numeric')
+                        if rating:
+                            hotel_sum += rating
+                            hotel_rated += 1
+                        if review.get('before_2020'):
+                            before_2020_count += 1
+                    total_before_2020 += before_2020_count
+
+                    # Отзывы до 2020 года при KEEP_BEFORE_2020=False отсеиваются
+                    # до сохранения и в результаты не попадают
+                    kept = reviews
+                    if not keep_before_2020 and before_2020_count:
+                        kept = [r for r in reviews if not r.get('before_2020')]
+                        self._dropped_before_2020 += before_2020_count
+                    if kept:
+                        self._add_results(kept)
+                        self._append_results(kept)
+                    total_reviews_collected += len(kept)
+
+                    out.append(f"      ✅ Собрано {n_reviews} отзывов")
+                    out.append(f"         📊 Средняя оценка: {hotel_sum / hotel_rated if hotel_rated else 0:.1f}")
+                    out.append(f"         🗓️  До 2020 года: {before_2020_count} отзывов"
+                               f"{'' if keep_before_2020 else ' (не сохраняются)'}")
+
+                    # Выводим информацию по первым отзывам
+                    for review in reviews[:2]:
+                        rating = review.get('review_rating_numeric') or 0
+                        date = review.get('review_date', 'нет даты')
+                        before_2020 = review.get('before_2020', False)
+                        out.append(f"         ⭐ {rating:.1f} | {date} | {'до 2020' if before_2020 else 'после 2020'}")
+
+                    if n_reviews > 2:
+                        out.append(f"         ... и еще {n_reviews - 2} отзывов")
+                else:
+                    out.append(f"      ⚠️  Отзывы не найдены")
 
-            # Помечаем отель как обработанный
-            self.processed_hotels.add(hotel['url'])
+                write('\n'.join(out) + '\n')
 
-            # Сохраняем прогресс каждые 10 отелей
-            if i % 10 == 0:
-                self._save_progress()
-                self._save_results()
+                # Помечаем отель как обработанный
+                mark_processed(url)
+                processed_this_page += 1
 
-            # Задержка между отелями (1-2 сек)
-            if i < len(hotels):
-                delay = random.uniform(
-                    self.config.DELAY_BETWEEN_HOTELS_MIN,
-                    self.config.DELAY_BETWEEN_HOTELS_MAX
-                )
-                if delay > 0:
-                    time.sleep(delay)
+                # Каждые 10 отелей - контрольная точка: журнал отзывов сбрасывается
+                # на диск и пишется небольшой файл прогресса. Полные CSV/JSON
+                # собираются из накопленных отзывов один раз в конце работы
+                if done % 10 == 0:
+                    self._save_progress()
+        finally:
+            # При прерывании не ждем оставшиеся загрузки
+            executor.shutdown(wait=False, cancel_futures=True)
 
         # Помечаем страницу как обработанную
-        self.processed_pages.add(page_num)
+        self._mark_page_processed(page_num)
         self._save_progress()
-        self._save_results()
 
         print(f"\n📊 Страница {page_num} завершена")
-        print(f"   Отелей обработано: {len([h for h in hotels if h['url'] in self.processed_hotels])}/{len(hotels)}")
+        print(f"   Отелей обработано: {processed_this_page}/{len(hotels)}")
         print(f"   Отзывов собрано: {total_reviews_collected}")
         print(f"   Отзывов до 2020 года: {total_before_2020}")
 
@@ -832,7 +1236,7 @@ class OtzyovikParser:
         print(
             f"   • Между страницами: {self.config.DELAY_BETWEEN_PAGES_MIN:.1f}-{self.config.DELAY_BETWEEN_PAGES_MAX:.1f} сек")
         print(
-            f"💾 Прогресс: {len(self.processed_pages)} стр., {len(self.processed_hotels)} отелей, {len(self.results)} отзывов")
+            f"💾 Прогресс: {len(self.processed_pages)} стр., {len(self.processed_hotels)} отелей, {len(self._review_rows)} отзывов")
         print("=" * 70)
 
         successful_pages = 0
@@ -847,7 +1251,8 @@ class OtzyovikParser:
                 if success:
                     successful_pages += 1
 
-                # Задержка между страницами (1-2 сек)
+                # Задержка между страницами выдерживается перед запросом
+                # следующей страницы, отсчет идет с текущего момента
                 if page_num < end_page:
                     delay = random.uniform(
                         self.config.DELAY_BETWEEN_PAGES_MIN,
@@ -855,18 +1260,21 @@ class OtzyovikParser:
                     )
                     if delay > 0:
                         print(f"\n⏳ Пауза {delay:.1f} сек перед следующей страницей...")
-                        time.sleep(delay)
+                        self._defer_next_request(delay)
 
             # Финальный отчет
-            elapsed_time = datetime.now() - self.start_time
+            elapsed_seconds = time.monotonic() - self._start_monotonic
+            elapsed_time = timedelta(seconds=elapsed_seconds)
 
-            # Статистика по оценкам и годам
-            if self.results:
-                ratings = [r.get('review_rating_numeric', 0) for r in self.results if r.get('review_rating_numeric')]
-                before_2020_count = sum(1 for r in self.results if r.get('before_2020'))
+            # Статистика по оценкам и годам. Доля отзывов до 2020 года - от всех
+            # разобранных отзывов, включая отсеянные при KEEP_BEFORE_2020=False
+            review_count = len(self._review_rows)
+            parsed_count = review_count + self._dropped_before_2020
+            if parsed_count:
+                before_2020_count = self._before_2020_count + self._dropped_before_2020
 
-                avg_rating = sum(ratings) / len(ratings) if ratings else 0
-                before_2020_percent = (before_2020_count / len(self.results)) * 100 if self.results else 0
+                avg_rating = self._rating_sum / self._rating_count if self._rating_count else 0
+                before_2020_percent = (before_2020_count / parsed_count) * 100
 
             print("\n" + "=" * 70)
             print("✅ СКРАПИНГ ЗАВЕРШЕН!")
@@ -874,28 +1282,32 @@ class OtzyovikParser:
             print(f"📊 СТАТИСТИКА:")
             print(f"   Успешных страниц: {successful_pages}/{end_page - start_page + 1}")
             print(f"   Обработано отелей: {len(self.processed_hotels)}")
-            print(f"   Собрано отзывов: {len(self.results)}")
+            print(f"   Собрано отзывов: {review_count}")
 
-            if self.results:
+            if parsed_count:
                 print(f"   Средняя оценка отзывов: {avg_rating:.2f}")
                 print(f"   Отзывов до 2020 года: {before_2020_count} ({before_2020_percent:.1f}%)")
+                if self._dropped_before_2020:
+                    print(f"   Из них отсеяно: {self._dropped_before_2020}")
 
             print(f"   Всего запросов: {self.total_requests}")
             print(f"   Блокировок: {self.blocked_count}")
             print(f"   Затраченное время: {elapsed_time}")
 
             # Расчет времени на отзыв
-            if self.total_requests > 0 and elapsed_time.total_seconds() > 0:
-                time_per_request = elapsed_time.total_seconds() / self.total_requests
+            if self.total_requests > 0 and elapsed_seconds > 0:
+                time_per_request = elapsed_seconds / self.total_requests
                 print(f"   Среднее время на запрос: {time_per_request:.2f} сек")
 
             print(f"\n💾 ФАЙЛЫ:")
             print(f"   Отзывы (CSV): {self.config.OUTPUT_FILE}")
             print(f"   Отзывы (JSON): {self.config.OUTPUT_FILE.replace('.csv', '.json')}")
             print(f"   Прогресс: {self.config.PROGRESS_FILE}")
+            print(f"   Журнал отзывов (JSONL): {self.results_log}")
             print(f"   Логи: logs/otzovik_parser.log")
 
-            # Сохраняем финальные результаты
+            # Сохраняем финальные результаты и сворачиваем журнал прогресса
+            self._save_progress(compact=True)
             self._save_results()
 
             # Сохраняем статистику
@@ -903,12 +1315,12 @@ class OtzyovikParser:
                 'successful_pages': successful_pages,
                 'total_pages_attempted': end_page - start_page + 1,
                 'hotels_processed': len(self.processed_hotels),
-                'reviews_collected': len(self.results),
+                'reviews_collected': review_count,
                 'total_requests': self.total_requests,
                 'blocked_count': self.blocked_count,
                 'start_time': self.start_time.isoformat(),
                 'end_time': datetime.now().isoformat(),
-                'elapsed_seconds': elapsed_time.total_seconds(),
+                'elapsed_seconds': elapsed_seconds,
                 'start_page': start_page,
                 'end_page': end_page,
                 'delays_config': {
@@ -922,20 +1334,21 @@ class OtzyovikParser:
                 }
             }
 
-            if self.results:
+            if parsed_count:
                 stats['average_rating'] = avg_rating
                 stats['reviews_before_2020'] = before_2020_count
                 stats['percent_before_2020'] = before_2020_percent
+                stats['reviews_before_2020_dropped'] = self._dropped_before_2020
 
-            with open('data/scraping_stats.json', 'w', encoding='utf-8') as f:
-                json.dump(stats, f, ensure_ascii=False, indent=2)
+            with open('data/scraping_stats.json', 'wb') as f:
+                f.write(orjson.dumps(stats, option=orjson.OPT_INDENT_2))
 
             print(f"📈 Статистика сохранена в data/scraping_stats.json")
 
         except KeyboardInterrupt:
             print("\n\n⏹️  СКРАПИНГ ПРЕРВАН ПОЛЬЗОВАТЕЛЕМ")
             print("💾 Сохраняю прогресс...")
-            self._save_progress()
+            self._save_progress(compact=True)
             self._save_results()
             print("✅ Прогресс сохранен. Можете продолжить позже.")
 
@@ -944,9 +1357,14 @@ class OtzyovikParser:
             import traceback
             traceback.print_exc()
             print("\n💾 Сохраняю прогресс перед завершением...")
-            self._save_progress()
+            self._save_progress(compact=True)
             self._save_results()
 
+        finally:
+            self._results_fp.close()
+            self._progress_fp.close()
+            self.session.close()
+
 
 # ===================== ИНТЕРФЕЙС КОМАНДНОЙ СТРОКИ =====================
 def main():
@@ -960,17 +1378,17 @@ def main():
     # Проверка зависимостей
     try:
         import requests
-        import pandas as pd
-        from bs4 import BeautifulSoup
+        from selectolax.lexbor import LexborHTMLParser
+        import orjson
         print("✅ Все зависимости установлены")
     except ImportError as e:
         print(f"\n❌ Отсутствуют зависимости: {e}")
         print("\nУстановите зависимости:")
-        print("   pip install requests pandas beautifulsoup4 lxml pyyaml")
+        print("   pip install requests selectolax orjson brotli pyyaml")
         return
 
     # Загружаем конфигурацию
-    config = Config()
+    config = Config.from_yaml()
     config.display()
 
     # Настройка параметров
@@ -1031,6 +1449,8 @@ def main():
         print(f"   Собираемые данные:")
         print(f"     ✓ Оценка каждого отзыва")
         print(f"     ✓ Признак 'до 2020 года'")
+        if not config.KEEP_BEFORE_2020:
+            print(f"     ✗ Отзывы до 2020 года не сохраняются (keep_before_2020: false)")
         print(f"     ✓ Даты отзывов")
         print(f"\n⚠️  ВНИМАНИЕ: Высокая скорость может привести к блокировке!")
         print("   При частых блокировках увеличьте задержки в config.py")
@@ -21,7 +21,7 @@ if [ -f "requirements.txt" ]; then
     pip install -r requirements.txt
 else
     echo "Установка основных зависимостей..."
-    pip install requests beautifulsoup4 pandas lxml pyyaml
+    pip install requests selectolax orjson brotli pyyaml
 fi
 
 # Проверяем существование необходимых файлов